@@ -1,73 +1,378 @@
 #!/usr/bin/env python
 
 import os
+import sys
 import time
 import json
+import queue
+import signal
+import heapq
 import datetime
-import requests
-import schedule
+import functools
+import itertools
+import logging
 import threading
 import multiprocessing
+from multiprocessing.connection import wait
+
+import treq
+
+try:
+    import orjson  # Optional: faster encoding of Telegram request bodies
+except ImportError:
+    orjson = None
+
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from logging.handlers import QueueHandler, QueueListener
 
 from dotenv import load_dotenv
-from twisted.internet import reactor, task
+from twisted.internet import defer, reactor, task, threads
+from twisted.web.client import HTTPConnectionPool
 from ctrader_open_api import Client, Protobuf, TcpProtocol, EndPoints
 from ctrader_open_api.messages.OpenApiModelMessages_pb2 import ProtoOAExecutionType
-from ctrader_open_api.messages.OpenApiCommonMessages_pb2 import ProtoHeartbeatEvent
+from ctrader_open_api.messages.OpenApiCommonMessages_pb2 import ProtoHeartbeatEvent, ProtoErrorRes
 from ctrader_open_api.messages.OpenApiMessages_pb2 import (
     ProtoOASubscribeSpotsRes, ProtoOAApplicationAuthRes,
     ProtoOADealListReq, ProtoOADealListRes, ProtoOAApplicationAuthReq,
     ProtoOAExecutionEvent, ProtoOAAccountLogoutRes, ProtoOAAccountAuthRes,
     ProtoOAGetPositionUnrealizedPnLReq, ProtoOAGetPositionUnrealizedPnLRes,
-    ProtoOAGetAccountListByAccessTokenReq, ProtoOAAccountLogoutReq, ProtoOAAccountAuthReq
+    ProtoOAGetAccountListByAccessTokenReq, ProtoOAAccountLogoutReq, ProtoOAAccountAuthReq,
+    ProtoOAErrorRes
 )
 
 # For logging use
 load_dotenv()
 
+def _require_env(name):
+    """Value of a required environment variable"""
+    value = os.getenv(name)
+    if value is None:
+        raise RuntimeError(f"Missing required environment variable {name}")
+    return value
+
+# Environment configuration, parsed and validated once at import
+_APP_CLIENT_ID = _require_env("APP_CLIENT_ID")
+_APP_CLIENT_SECRET = _require_env("APP_CLIENT_SECRET")
+_ACCESS_TOKEN = _require_env("ACCESS_TOKEN")
+
+_HOST_REQUESTED = _require_env("ACCOUNT_TYPE").lower()
+# Invalid values fall back to demo; main() warns about it once, from the parent
+_HOST = _HOST_REQUESTED if _HOST_REQUESTED in ("live", "demo") else "demo"
+
+_TG_TOKEN = _require_env("TELEGRAM_BOT_TOKEN")
+_TG_CHAT = _require_env("TELEGRAM_CHAT_ID")
+
+_PNL_INTERVAL = int(_require_env("SCHEDULE_PNL_REPORT_INTERVAL"))
+_PNL_MIN = int(_require_env("SCHEDULE_PNL_REPORT_TIME"))
+_DEALS_INTERVAL = int(_require_env("SCHEDULE_DEALS_REPORT_INTERVAL"))
+_DEALS_TIME = datetime.time.fromisoformat(_require_env("SCHEDULE_DEALS_REPORT_TIME"))
+# Default 04:00 in Saturday UTC +7 # 21:00 in Friday UTC 0
+_WEEKLY_TIME = datetime.time.fromisoformat(os.getenv("SCHEDULE_WEEKLY_REPORT_TIME", "21:15"))
+
+# Powers of ten for scaling moneyDigits/volume digits
+_POW10 = [10 ** i for i in range(16)]
+
+# Opening direction of a closing deal, indexed by tradeSide == 1 (BUY)
+DEAL_DIRECTION = ('Buy', 'Sell')
+
+# Execution notification titles by positionStatus, and trade side labels by tradeSide
+POSITION_STATUS_TITLE = {1: "🚀 NEW POSITION OPEN", 2: "✅ POSITION CLOSED AUTO", 3: "✅ POSITION CLOSED MANUAL"}
+TRADE_SIDE_LABEL = {1: '🟢 BUY', 2: '🔴 SELL'}
+
+# Symbol names by symbolId
+_SYMBOL_MAP = {
+    5: "AUDUSD",
+    12: "NZDUSD",
+    41: "XAUUSD",
+    10026: "BTCUSD"
+}
+
+# Volume digits by symbolId; other symbols default to 5 digits
+_VOLUME_DIGITS = {
+    41: 2,        # XAUUSD
+    10026: 0,     # BTCUSD
+}
+
+# Timestamp format used in every report and notification; datetimes already in
+# hand are rendered the same way with isoformat(' ', 'seconds')
+TIME_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+# (epoch second, formatted) of the last _now_str call
+_now_str_cache = (-1, '')
+
+def _now_str():
+    """Current local time formatted with TIME_FORMAT, formatted once per second"""
+    global _now_str_cache
+    now = int(time.time())
+    cached_second, cached = _now_str_cache
+    if cached_second == now:
+        return cached
+    formatted = time.strftime(TIME_FORMAT, time.localtime(now))
+    # Swapped as one tuple so report threads never see a mismatched pair
+    _now_str_cache = (now, formatted)
+    return formatted
+
+# Trading hours
+MARKET_OPEN = datetime.time(22, 2, 0)            # 22:02:00
+MARKET_CLOSE_FRIDAY = datetime.time(20, 57, 0)   # 20:57:00
+
+def _market_open_at(weekday, minute_of_day):
+    """Whether the market is open at a minute of the week (0=Monday, 6=Sunday)"""
+    minute_time = datetime.time(minute_of_day // 60, minute_of_day % 60)
+    if weekday == 6:  # Sunday
+        # Sunday trading starts at 22:02:00
+        return minute_time >= MARKET_OPEN
+    elif weekday <= 3:  # Monday to Thursday
+        # Trading ends at 20:59:00, then starts again at 22:02:00
+        return True
+    elif weekday == 4:  # Friday
+        # Friday trading ends at 20:57:00
+        return minute_time <= MARKET_CLOSE_FRIDAY
+    else:  # Saturday (5)
+        return False
+
+# One byte per minute of the week, 1 while the market is open
+_TRADING_MINUTES = bytes(
+    _market_open_at(weekday, minute)
+    for weekday in range(7)
+    for minute in range(1440)
+)
+
+# Strips angle brackets so text can't break Telegram's HTML parse mode
+_HTML_STRIP = str.maketrans('', '', '<>')
+
+# Report table layouts, built once at import
+_PNL_HEADER = f"{'PID':<10} {'Gross':<9} {'Net':<9}\n"
+_PNL_SEP = f"{'-'*10} {'-'*9} {'-'*9}\n"
+_PNL_ROW_FMT = "{:<10} {:<9.2f} {:<9.2f}\n"
+_PNL_TOTAL_FMT = f"{'TOTAL':<10} " + "{:<9.2f} {:<9.2f}\n"
+
+_DEAL_HEADER = f"{'DID':<10} {'Symbol':<7} {'Side':<5} {'Time':<9} {'Vol':<5} {'Swap':<6} {'Comm':<6} {'Net':<7} {'Bal':<9}\n"
+_DEAL_SEP = f"{'-'*10} {'-'*7} {'-'*5} {'-'*9} {'-'*5} {'-'*6} {'-'*6} {'-'*7} {'-'*9}\n"
+_DEAL_ROW_FMT = "{:<10} {:<7} {:<5} {:<9} {:<5.2f} {:<6.2f} {:<6.2f} {:<7.2f} {:<9.2f}\n"
+_DEAL_TOTAL_FMT = f"{'TOTAL':<10} {'':<7} {'':<5} {'':<9} {'':<5} " + "{:<6.2f} {:<6.2f} {:<7.2f} {:<9.2f}\n"
+
+_WEEKLY_HEADER = f"{'Date':<10} {'Symbol':<7} {'Side':<5} {'Vol':<5} {'Swap':<6} {'Comm':<6} {'Net':<7}\n"
+_WEEKLY_SEP = f"{'-'*10} {'-'*7} {'-'*5} {'-'*5} {'-'*6} {'-'*6} {'-'*7}\n"
+_WEEKLY_ROW_FMT = "{:<10} {:<7} {:<5} {:<5.2f} {:<6.2f} {:<6.2f} {:<7.2f}\n"
+_WEEKLY_TOTAL_FMT = f"{'TOTAL':<10} {'':<7} {'':<5} {'':<5} " + "{:<6.2f} {:<6.2f} {:<7.2f}\n"
+
+# Complete empty reports; only the account label and times are filled in
+_EMPTY_DEAL_FMT = (
+    "📊 <b>Daily Deal Report {label}</b>\n"
+    "📅 Date: {date}\n"
+    "⏰ Report Time: {now}\n\n"
+    "<pre>✅ No closed deals found for this period.</pre>"
+)
+_EMPTY_WEEKLY_FMT = (
+    "📊 <b>Weekly Deal Report {label}</b>\n"
+    "📅 Week: {start} to {end}\n"
+    "⏰ Report Time: {now}\n\n"
+    "<pre>✅ No closed deals found for this week.</pre>"
+)
+_EMPTY_PNL_FMT = (
+    "📊 <b>Open Position Report {label}</b>\n"
+    "⏰ Time: {now}\n\n"
+    "<pre>🎯 No Open Position</pre>"
+)
+
+# Telegram sendMessage limits
+TELEGRAM_MAX_MESSAGE_LENGTH = 4096
+# Coalesce messages queued within this many seconds into one sendMessage
+TELEGRAM_FLUSH_INTERVAL = float(os.getenv("TELEGRAM_BATCH_FLUSH_INTERVAL", "0.2"))
+
+# Retry rate-limited / unavailable responses, honouring Retry-After
+TELEGRAM_MAX_RETRIES = 3
+TELEGRAM_RETRY_BACKOFF = 0.25  # 0.25s, 0.5s, 1s when no Retry-After
+TELEGRAM_RETRY_STATUS = frozenset({429, 502, 503, 504})
+
+# Request headers for the pre-encoded sendMessage body
+TELEGRAM_JSON_HEADERS = {b'Content-Type': [b'application/json']}
+
+def _json_bytes(obj):
+    """obj encoded as a UTF-8 JSON body, with orjson when it is installed"""
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj, ensure_ascii=False, separators=(',', ':')).encode()
+
+# Account processes allowed to authenticate against the Open API at the same time
+AUTH_CONCURRENCY = 2
+AUTH_SLOT_TIMEOUT = 10  # Seconds to wait for a slot before authenticating anyway
+AUTH_SLOT_HOLD = 30  # Seconds a slot is held at most, even if auth never answers
+
+# Restart delay for a crashed account process: 1s, 2s, 4s ... capped at 60s.
+# A process that stayed up longer than the cap starts again from 1s.
+RESTART_BACKOFF_MAX = 60
+
+# How often account processes check the parent's shutdown event, and how long
+# the parent waits for them before falling back to terminate() and kill()
+SHUTDOWN_POLL_INTERVAL = 0.5
+SHUTDOWN_GRACE = 5
+
+# Idle, already-imported processes kept ready to take over a restarted account
+WARM_SPARES = 1
+
+# Keep-alive connections to api.telegram.org, shared by every send in this process
+telegram_pool = HTTPConnectionPool(reactor, persistent=True)
+telegram_pool.maxPersistentPerHost = 4  # Batched sends rarely need more than one
+telegram_pool.cachedConnectionTimeout = 60  # Drop idle connections before the server does
+
+def start_log_listener(log_queue):
+    """Write records from log_queue to stdout on a background thread"""
+    stream_handler = logging.StreamHandler(sys.stdout)
+    stream_handler.setFormatter(logging.Formatter("[%(name)s] %(message)s"))
+    listener = QueueListener(log_queue, stream_handler)
+    listener.start()
+    return listener
+
+def setup_logging(log_queue=None):
+    """Log through a queue so the reactor thread never blocks writing to stdout
+
+    Account processes pass the parent's multiprocessing queue and get no
+    listener back; only the parent writes to stdout.
+    """
+    listener = None
+    if log_queue is None:
+        log_queue = queue.Queue(-1)
+        listener = start_log_listener(log_queue)
+
+    root_logger = logging.getLogger()
+    root_logger.setLevel(os.getenv("LOG_LEVEL", "INFO").upper())
+    root_logger.addHandler(QueueHandler(log_queue))
+    return listener
+
+def next_run_at(now, at_time, weekday=None):
+    """Next datetime after now at at_time, optionally on a given weekday (0=Monday)"""
+    next_run = now.replace(hour=at_time.hour, minute=at_time.minute, second=at_time.second, microsecond=0)
+    if weekday is not None:
+        next_run += datetime.timedelta(days=(weekday - now.weekday()) % 7)
+    if next_run <= now:
+        next_run += datetime.timedelta(days=1 if weekday is None else 7)
+    return next_run
+
+def trading_hours_only(job):
+    """Skip a scheduled job, before any request or message is built, while the market is closed"""
+    @functools.wraps(job)
+    def wrapper(self, *args, **kwargs):
+        if not self.is_trading_hours():
+            self.log.debug(f"Outside trading hours - {job.__name__} skipped for A/c {self.current_account_id}")
+            return None
+        return job(self, *args, **kwargs)
+    return wrapper
+
+class AuthSlot:
+    """One account process's share of the auth semaphore
+
+    The parent keeps the same handle, so it can give back a slot the process
+    was holding when it died; semaphores aren't released on process exit.
+    Only the owning process, or the parent once it has exited, touches it.
+    """
+
+    def __init__(self, semaphore):
+        self._semaphore = semaphore
+        self._held = multiprocessing.RawValue('i', 0)
+
+    def acquire(self, timeout):
+        """Wait up to timeout for a slot; True if one was taken"""
+        if self._semaphore.acquire(True, timeout):
+            self._held.value += 1
+            return True
+        return False
+
+    def release(self):
+        """Give one held slot back (a no-op if none is held)"""
+        if self._held.value > 0:
+            self._held.value -= 1
+            self._semaphore.release()
+
+    def release_all(self):
+        """Give back every slot still held, for a process that has exited"""
+        while self._held.value > 0:
+            self.release()
+
 class CTraderAsyncClient:
-    def __init__(self, ctid_trader_account_id=None, process_name=None):
+    # Payload types, resolved once instead of building a message per comparison
+    _PT_HEARTBEAT = ProtoHeartbeatEvent().payloadType
+    _PT_APP_AUTH_RES = ProtoOAApplicationAuthRes().payloadType
+    _PT_ACCT_AUTH_RES = ProtoOAAccountAuthRes().payloadType
+    _PT_PNL_RES = ProtoOAGetPositionUnrealizedPnLRes().payloadType
+    _PT_DEAL_RES = ProtoOADealListRes().payloadType
+    _PT_EXEC = ProtoOAExecutionEvent().payloadType
+    _PT_ERRORS = frozenset({ProtoOAErrorRes().payloadType, ProtoErrorRes().payloadType})
+    _PT_IGNORED = frozenset({ProtoOASubscribeSpotsRes().payloadType, ProtoOAAccountLogoutRes().payloadType})
+
+    def __init__(self, ctid_trader_account_id=None, process_name=None, auth_slot=None):
         self.client = None
         self.current_account_id = ctid_trader_account_id
         self.process_name = process_name or f"Process-{ctid_trader_account_id}"
+        self.log = logging.getLogger(self.process_name)
         self.connection_completed = False
         self.command_processed = True
         self.shutdown_event = threading.Event()
         self.connection_attempts = 0
         self.max_connection_attempts = 10  # Increased to handle longer disconnections
 
-        # Load environment variables
-        self.app_client_id = os.getenv("APP_CLIENT_ID")
-        self.app_client_secret = os.getenv("APP_CLIENT_SECRET")
-        self.access_token = os.getenv("ACCESS_TOKEN")
-        self.host_type = os.getenv("ACCOUNT_TYPE").lower()
+        # Share of the semaphore that bounds concurrent auth across account processes
+        self._auth_slot = auth_slot
+        self._auth_release_call = None
+        # Bumped on every connect/disconnect so a late slot is matched to its connection
+        self._auth_generation = 0
+
+        # Environment configuration
+        self.app_client_id = _APP_CLIENT_ID
+        self.app_client_secret = _APP_CLIENT_SECRET
+        self.access_token = _ACCESS_TOKEN
+        self.host_type = _HOST
 
         # Telegram bot configuration
-        self.telegram_bot_token = os.getenv("TELEGRAM_BOT_TOKEN")
-        self.telegram_chat_id = os.getenv("TELEGRAM_CHAT_ID")
+        self.telegram_bot_token = _TG_TOKEN
+        self.telegram_chat_id = _TG_CHAT
+        self._tg_url = f"https://api.telegram.org/bot{self.telegram_bot_token}/sendMessage"
+
+        # Account labels reused by every report and notification
+        self._host_cap = self.host_type.capitalize()
+        self._account_label = f"{self._host_cap} A/c {self.current_account_id}"
+        self._msg_prefix = f"🏦 {self._account_label}\n"
 
         self.position_pnl_data = None
         self.money_digits = 2
         self.deal_list_data = None
 
-        # Scheduler task
-        self.scheduler_task = None
+        # Scheduled report jobs: name -> (handler, at_time, weekday, interval_days)
+        self._jobs = {}
+        # Min-heap of (next run epoch, job name, next run datetime)
+        self._job_heap = []
+        # Single reactor.callLater armed for the earliest job
+        self._tick_call = None
+
+        # Report requests from coinciding jobs, sent back to back in one reactor turn
+        self._pending = deque()
+        self._flush_pending_call = None
+        # clientMsgId -> (report kind, start of day) for deal list requests in flight
+        self._deal_requests = {}
+        self._client_msg_ids = itertools.count(1)
+
+        # Telegram messages waiting to be coalesced into one sendMessage call
+        self._tg_queue: list[str] = []
+        self._tg_lock = threading.Lock()
+        # One-shot flush, armed only when the queue goes from empty to non-empty
+        self._tg_flush_armed = False
+        self._tg_flush_call = None
+        # sendMessage Deferreds not finished yet, waited for before shutdown
+        self._tg_inflight = set()
+
+        # Builds large deal reports off the reactor thread
+        self._report_pool = ThreadPoolExecutor(max_workers=2, thread_name_prefix=f"report-{ctid_trader_account_id}")
 
-        # Tạo session để tái sử dung connection
-        self.session = requests.Session()
 
     def initialize(self):
-        """Initialize the client and validate host type"""
-        print(f"[{self.process_name}] Initializing client for account {self.current_account_id}")
-
-        # Validate host type
-        if self.host_type not in ["live", "demo"]:
-            print(f"{self.host_type} is not a valid host type. Using demo.")
-            self.host_type = "demo"
+        """Initialize the client"""
+        self.log.info(f"Initializing client for account {self.current_account_id}")
 
         host = EndPoints.PROTOBUF_LIVE_HOST if self.host_type == "live" else EndPoints.PROTOBUF_DEMO_HOST
 
-        print(f"[{self.process_name}] Connecting to {host}:{EndPoints.PROTOBUF_PORT}")
+        self.log.info(f"Connecting to {host}:{EndPoints.PROTOBUF_PORT}")
 
         self.client = Client(host, EndPoints.PROTOBUF_PORT, TcpProtocol)
 
@@ -76,130 +381,214 @@ class CTraderAsyncClient:
         self.client.setDisconnectedCallback(self.disconnected)
         self.client.setMessageReceivedCallback(self.on_message_received)
 
+        # payloadType -> handler for on_message_received
+        self._dispatch = {
+            self._PT_HEARTBEAT: self._on_heartbeat,
+            self._PT_APP_AUTH_RES: self._on_app_auth,
+            self._PT_ACCT_AUTH_RES: self._on_account_auth,
+            self._PT_PNL_RES: self._on_pnl_res,
+            self._PT_DEAL_RES: self._on_deal_list_res,
+            self._PT_EXEC: self._on_execution_event,
+        }
+        for payload_type in self._PT_IGNORED:
+            self._dispatch[payload_type] = self._on_ignored
+        for payload_type in self._PT_ERRORS:
+            self._dispatch[payload_type] = self._on_error_res
+
         # Schedule reports
-        schedule_pnl_report_interval = int(os.getenv("SCHEDULE_PNL_REPORT_INTERVAL"))
-        schedule_pnl_report_time = int(os.getenv("SCHEDULE_PNL_REPORT_TIME"))
         # Calculate minutes for PnL report based on interval
-        for hour in range(0, 24, schedule_pnl_report_interval):
-            schedule.every().day.at(f"{hour:02d}:{schedule_pnl_report_time:02d}").do(self.schedule_pnl_report)
-
-        schedule_deals_report_interval = int(os.getenv("SCHEDULE_DEALS_REPORT_INTERVAL"))
-        schedule_deals_report_time = os.getenv("SCHEDULE_DEALS_REPORT_TIME")
-        schedule.every(schedule_deals_report_interval).days.at(schedule_deals_report_time).do(self.schedule_daily_deal_report)
+        for hour in range(0, 24, _PNL_INTERVAL):
+            self._jobs[f"pnl-{hour:02d}"] = (self.schedule_pnl_report, datetime.time(hour, _PNL_MIN), None, 1)
 
-        # Default 04:00 in Saturday UTC +7 # 21:00 in Friday UTC 0
-        schedule_weekly_report_time = os.getenv("SCHEDULE_WEEKLY_REPORT_TIME", "21:15")
-        schedule.every().friday.at(schedule_weekly_report_time).do(self.schedule_weekly_deal_report)
+        self._jobs["daily-deals"] = (self.schedule_daily_deal_report, _DEALS_TIME, None, _DEALS_INTERVAL)
+        self._jobs["weekly-deals"] = (self.schedule_weekly_deal_report, _WEEKLY_TIME, 4, 7)  # 4=Friday
 
         # Start scheduler
-        self.scheduler_task = task.LoopingCall(self.run_scheduler)
-        self.scheduler_task.start(60)  # Run every 60 seconds
+        for job_name in self._jobs:
+            self._push_job(job_name)
+        self._tick()
+
+        # Deliver what's still queued before the reactor goes away
+        reactor.addSystemEventTrigger('before', 'shutdown', self._drain_tg)
 
     def connected(self, client):
         """Callback for client connection"""
-        print(f"[{self.process_name}] Connected successfully {self.host_type.capitalize()} A/c {self.current_account_id}")
+        self.log.info(f"Connected successfully {self._account_label}")
         self.connection_attempts = 0
+        self._auth_generation += 1
+
+        if self._auth_slot is None:
+            self._send_app_auth(client)
+            return
 
-        # Send application auth request
+        # Wait for an auth slot off the reactor thread
+        deferred = threads.deferToThread(self._auth_slot.acquire, AUTH_SLOT_TIMEOUT)
+        deferred.addCallback(self._on_auth_slot, client, self._auth_generation)
+        deferred.addErrback(self.on_error)
+
+    def _on_auth_slot(self, acquired, client, generation):
+        """Authenticate once an auth slot is free (or waiting for one timed out)"""
+        if generation != self._auth_generation:
+            # The connection this slot was waited for has gone; a reconnect waits for its own
+            if acquired:
+                self._auth_slot.release()
+            return
+        if acquired:
+            # Never hold the slot past AUTH_SLOT_HOLD, whatever happens to the auth
+            if self._auth_release_call is not None and self._auth_release_call.active():
+                self._auth_release_call.cancel()
+            self._auth_release_call = reactor.callLater(AUTH_SLOT_HOLD, self._release_auth_slot)
+        self._send_app_auth(client)
+
+    def _release_auth_slot(self):
+        """Let the next account process authenticate"""
+        if self._auth_release_call is not None and self._auth_release_call.active():
+            self._auth_release_call.cancel()
+        self._auth_release_call = None
+        if self._auth_slot is not None:
+            self._auth_slot.release()
+
+    def _send_app_auth(self, client):
+        """Send application auth request"""
         request = ProtoOAApplicationAuthReq()
         request.clientId = self.app_client_id
         request.clientSecret = self.app_client_secret
 
-        print(f"[{self.process_name}] Sending application auth request...")
+        self.log.info("Sending application auth request...")
         deferred = client.send(request)
         deferred.addErrback(self.on_error)
 
     def disconnected(self, client, reason):
         """Callback for client disconnection"""
-        print(f"[{self.process_name}] Disconnected - Account {self.current_account_id}: {reason}")
+        self.log.warning(f"Disconnected - Account {self.current_account_id}: {reason}")
         self.connection_completed = False
+        self._auth_generation += 1
+        self._release_auth_slot()
+        # Responses to requests sent before the disconnect won't arrive
+        self._deal_requests.clear()
 
         # Clean up the reason string to remove HTML-like tags
-        reason_str = str(reason)
         # Remove any angle brackets that might cause issues
-        reason_str = reason_str.replace('<', '').replace('>', '')
+        reason_str = str(reason).translate(_HTML_STRIP)
 
         # Send disconnection notification to Telegram
         disconnect_msg = f"⚠️ <b>CONNECTION LOST</b>\n"
-        disconnect_msg += f"🏦 {self.host_type.capitalize()} A/c {self.current_account_id}\n"
-        disconnect_msg += f"📅 Time: {datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n"
+        disconnect_msg += self._msg_prefix
+        disconnect_msg += f"📅 Time: {_now_str()}\n"
         disconnect_msg += f"📝 Reason: {reason_str}\n"
-        print(f"[{self.process_name}] Sending disconnection message to Telegram: {disconnect_msg}")
+        self.log.info(f"Sending disconnection message to Telegram: {disconnect_msg}")
         # self.send_telegram_message(disconnect_msg)
 
     def on_message_received(self, client, message):
         """Callback for receiving all messages"""
-        # Handle heartbeat
-        if message.payloadType == ProtoHeartbeatEvent().payloadType:
-            print(f"[{self.process_name}] Heartbeat received at {datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+        handler = self._dispatch.get(message.payloadType, self._on_unknown)
+        handler(message)
+
+    def _on_heartbeat(self, message):
+        """Handle heartbeat"""
+        if self.log.isEnabledFor(logging.DEBUG):
+            self.log.debug(f"Heartbeat received at {_now_str()}")
+
+    def _on_ignored(self, message):
+        """Ignored messages"""
+
+    def _on_error_res(self, message):
+        """Error response, e.g. a rejected auth; frees the auth slot and is logged in full"""
+        self._release_auth_slot()
+        self._on_unknown(message)
+
+    def _on_app_auth(self, message):
+        """Handle application auth response"""
+        self.log.info(f"API authorized {self._account_label}")
+        if self.current_account_id is not None:
+            self.send_proto_oa_account_auth_req()
             return
+        self._release_auth_slot()
+        self.connection_completed = True
+        self.command_processed = True
 
-        # List of ignored messages
-        if message.payloadType in [ProtoOASubscribeSpotsRes().payloadType, ProtoOAAccountLogoutRes().payloadType]:
-            return
+    def _on_account_auth(self, message):
+        """Handle account auth response"""
+        protoOAAccountAuthRes = Protobuf.extract(message)
+        self.log.info(f"Account {protoOAAccountAuthRes.ctidTraderAccountId} has been authorized")
+        self._release_auth_slot()
+        self.connection_completed = True
+
+        # Send reconnection success notification if this was a reconnection
+        if self.connection_attempts > 0:
+            success_msg = f"✅ <b>RECONNECTION SUCCESSFUL</b>\n"
+            success_msg += self._msg_prefix
+            success_msg += f"📅 Time: {_now_str()}\n"
+            success_msg += f"🔄 Connection restored after {self.connection_attempts} attempts."
+            self.send_telegram_message(success_msg)
+            self.connection_attempts = 0
+        self.command_processed = True
 
-        elif message.payloadType == ProtoOAApplicationAuthRes().payloadType:
-            print(f"[{self.process_name}] API authorized {self.host_type.capitalize()} A/c {self.current_account_id}")
-            if self.current_account_id is not None:
-                self.send_proto_oa_account_auth_req()
-                return
-            self.connection_completed = True
-
-        elif message.payloadType == ProtoOAAccountAuthRes().payloadType:
-            protoOAAccountAuthRes = Protobuf.extract(message)
-            print(f"[{self.process_name}] Account {protoOAAccountAuthRes.ctidTraderAccountId} has been authorized")
-            self.connection_completed = True
-
-            # Send reconnection success notification if this was a reconnection
-            if self.connection_attempts > 0:
-                success_msg = f"✅ <b>RECONNECTION SUCCESSFUL</b>\n"
-                success_msg += f"🏦 {self.host_type.capitalize()} A/c {self.current_account_id}\n"
-                success_msg += f"📅 Time: {datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n"
-                success_msg += f"🔄 Connection restored after {self.connection_attempts} attempts."
-                self.send_telegram_message(success_msg)
-                self.connection_attempts = 0
-
-        elif message.payloadType == ProtoOAGetPositionUnrealizedPnLRes().payloadType:
-            pnl_response = Protobuf.extract(message)
-            self.position_pnl_data = pnl_response.positionUnrealizedPnL
-            self.money_digits = pnl_response.moneyDigits
-            print(f"[{self.process_name}] Position PnL data received - Account {self.current_account_id}: {len(self.position_pnl_data)} positions")
-
-            if self.position_pnl_data:
-                self.send_pnl_telegram_report()
-            else:
-                self.send_empty_pnl_telegram_report()
-
-        elif message.payloadType == ProtoOADealListRes().payloadType:
-            deal_response = Protobuf.extract(message)
-            self.deal_list_data = deal_response.deal
-            print(f"[{self.process_name}] Deal list data received - Account {self.current_account_id}: {len(self.deal_list_data)} deals")
-
-            # Check if this is weekly report
-            if hasattr(self, 'is_weekly_report') and self.is_weekly_report:
-                self.is_weekly_report = False  # Reset flag
-                if self.deal_list_data:
-                    self.send_weekly_deal_telegram_report()
-                else:
-                    self.send_empty_weekly_deal_telegram_report()
+    def _on_pnl_res(self, message):
+        """Handle position unrealized PnL response"""
+        pnl_response = Protobuf.extract(message)
+        self.position_pnl_data = pnl_response.positionUnrealizedPnL
+        self.money_digits = pnl_response.moneyDigits
+        self.log.info(f"Position PnL data received - Account {self.current_account_id}: {len(self.position_pnl_data)} positions")
+
+        if self.position_pnl_data:
+            self.send_pnl_telegram_report()
+        else:
+            self.send_empty_pnl_telegram_report()
+        self.command_processed = True
+
+    def _on_deal_list_res(self, message):
+        """Handle deal list response"""
+        deal_response = Protobuf.extract(message)
+        self.deal_list_data = deal_response.deal
+        self.log.info(f"Deal list data received - Account {self.current_account_id}: {len(self.deal_list_data)} deals")
+
+        # Match the response to its request to know which report it is for
+        report_kind, start_of_day = self._deal_requests.pop(message.clientMsgId, ("daily", None))
+
+        # Check if this is weekly report
+        if report_kind == "weekly":
+            if self.deal_list_data:
+                self._submit_report(self.send_weekly_deal_telegram_report, self.deal_list_data)
             else:
-                # Original daily report logic
+                self.send_empty_weekly_deal_telegram_report()
+        else:
+            # Original daily report logic
+            if start_of_day is None:
                 yesterday = datetime.datetime.now() - datetime.timedelta(days=1)
                 start_of_day = yesterday.replace(hour=0, minute=0, second=0, microsecond=0)
 
-                if self.deal_list_data:
-                    self.send_deal_telegram_report(start_of_day)
-                else:
-                    self.send_empty_deal_telegram_report(start_of_day)
-
-        elif message.payloadType == ProtoOAExecutionEvent().payloadType:
-            execution_event = Protobuf.extract(message)
-            if hasattr(execution_event, 'executionType') and execution_event.executionType == ProtoOAExecutionType.ORDER_FILLED:
-                self.handle_execution_event(execution_event)
+            if self.deal_list_data:
+                self._submit_report(self.send_deal_telegram_report, start_of_day, self.deal_list_data)
+            else:
+                self.send_empty_deal_telegram_report(start_of_day)
+        self.command_processed = True
 
-        else:
-            print(f"[{self.process_name}] Message received - Account {self.current_account_id}: \n", Protobuf.extract(message))
+    def _submit_report(self, report, *args):
+        """Run a report builder in the report pool so it can't stall the reactor"""
+        try:
+            future = self._report_pool.submit(report, *args)
+        except RuntimeError:
+            # The pool is shut down once reactor shutdown starts; drop late deal lists
+            self.log.warning(f"Shutting down - {report.__name__} dropped for A/c {self.current_account_id}")
+            return
+        future.add_done_callback(self._on_report_done)
+
+    def _on_report_done(self, future):
+        """Surface report builder errors back on the reactor thread"""
+        if not future.cancelled() and future.exception() is not None:
+            reactor.callFromThread(self.on_error, future.exception())
+
+    def _on_execution_event(self, message):
+        """Handle execution event"""
+        execution_event = Protobuf.extract(message)
+        if execution_event.executionType == ProtoOAExecutionType.ORDER_FILLED:
+            self.handle_execution_event(execution_event)
+        self.command_processed = True
 
+    def _on_unknown(self, message):
+        """Messages without a handler, e.g. error responses; logged in full"""
+        self.log.info(f"Message received - Account {self.current_account_id}: \n{Protobuf.extract(message)}")
         self.command_processed = True
 
     def handle_execution_event(self, execution_event):
@@ -211,30 +600,34 @@ class CTraderAsyncClient:
         volume = self.calculate_volume(deal.symbolId, deal.volume, deal.moneyDigits)
 
         # Add account ID to telegram message to distinguish between accounts
-        print("positionStatus...", positionStatus)
-        telegram_msg = f"<b>{"🚀 NEW POSITION OPEN" if positionStatus == 1 else "✅ POSITION CLOSED AUTO" if positionStatus == 2 else "✅ POSITION CLOSED MANUAL" if positionStatus == 3 else 'n/a' }</b>\n"
-        telegram_msg += f"🏦 {self.host_type.capitalize()} A/c {self.current_account_id}\n"
-        telegram_msg += f"🆔 PID: {deal.positionId}\n"
-        telegram_msg += f"📉 Symbol: {symbol}\n"
+        self.log.debug(f"positionStatus... {positionStatus}")
+        parts = [
+            f"<b>{POSITION_STATUS_TITLE.get(positionStatus, 'n/a')}</b>\n",
+            self._msg_prefix,
+            f"🆔 PID: {deal.positionId}\n",
+            f"📉 Symbol: {symbol}\n",
+        ]
         if positionStatus == 1:
-            telegram_msg += f"📈 Trade Side: {'🟢 BUY' if deal.tradeSide == 1 else '🔴 SELL' if deal.tradeSide == 2 else 'n/a'}\n"
-        telegram_msg += f"📦 Volume: {volume} lot\n"
+            parts.append(f"📈 Trade Side: {TRADE_SIDE_LABEL.get(deal.tradeSide, 'n/a')}\n")
+        parts.append(f"📦 Volume: {volume} lot\n")
 
-        if hasattr(deal, 'executionPrice'):
-            telegram_msg += f"🎯 Execution Price: {deal.executionPrice}\n"
+        if deal.HasField('executionPrice'):
+            parts.append(f"🎯 Execution Price: {deal.executionPrice}\n")
         if positionStatus == 2 or positionStatus == 3:
-            telegram_msg += f"🚪 Entry Price: {deal.closePositionDetail.entryPrice}\n"
-            telegram_msg += f"💰 GrossProfit: {deal.closePositionDetail.grossProfit/ (10 ** deal.moneyDigits)}\n"
-            telegram_msg += f"🔄 Swap: {deal.closePositionDetail.swap/ (10 ** deal.moneyDigits)}\n"
-            telegram_msg += f"💸 Commission: {deal.closePositionDetail.commission/ (10 ** deal.moneyDigits)}\n"
-            telegram_msg += f"💰 Balance: {deal.closePositionDetail.balance/ (10 ** deal.moneyDigits)}\n"
+            close_detail = deal.closePositionDetail
+            scale = _POW10[deal.moneyDigits]
+            parts.append(f"🚪 Entry Price: {close_detail.entryPrice}\n")
+            parts.append(f"💰 GrossProfit: {close_detail.grossProfit / scale}\n")
+            parts.append(f"🔄 Swap: {close_detail.swap / scale}\n")
+            parts.append(f"💸 Commission: {close_detail.commission / scale}\n")
+            parts.append(f"💰 Balance: {close_detail.balance / scale}\n")
 
-        telegram_msg += f"⏰ Time: {datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')}"
-        self.send_telegram_message(telegram_msg)
+        parts.append(f"⏰ Time: {_now_str()}")
+        self.send_telegram_message("".join(parts))
 
     def on_error(self, failure):
         """Callback for errors"""
-        print(f"[{self.process_name}] Message Error - Account {self.current_account_id}: {failure}")
+        self.log.error(f"Message Error - Account {self.current_account_id}: {failure}")
 
     def send_proto_oa_get_account_list_by_access_token_req(self, client_msg_id=None):
         """Send get account list request"""
@@ -277,37 +670,86 @@ class CTraderAsyncClient:
         deferred = self.client.send(request, clientMsgId=client_msg_id)
         deferred.addErrback(self.on_error)
 
-    def run_scheduler(self):
-        """Run the scheduler"""
-        schedule.run_pending()
-
+    def _push_job(self, job_name, last_run=None):
+        """Push the next run of a scheduled job onto the job heap"""
+        _, at_time, weekday, interval_days = self._jobs[job_name]
+        if last_run is None:
+            next_run = next_run_at(datetime.datetime.now(), at_time, weekday)
+        else:
+            # Skip occurrences missed during a stall or clock jump, so a late job runs once
+            interval = datetime.timedelta(days=interval_days)
+            now = datetime.datetime.now()
+            next_run = last_run + interval
+            while next_run <= now:
+                next_run += interval
+        heapq.heappush(self._job_heap, (next_run.timestamp(), job_name, next_run))
+
+    def _tick(self):
+        """Run all due jobs, then sleep until the earliest next run"""
+        self._tick_call = None
+        while self._job_heap and self._job_heap[0][0] <= time.time():
+            _, job_name, run_at = heapq.heappop(self._job_heap)
+            try:
+                self._jobs[job_name][0]()
+            except Exception as e:
+                self.log.error(f"Error in scheduled job {job_name}: {e}")
+            self._push_job(job_name, run_at)
+
+        if self._job_heap:
+            delay = max(0, self._job_heap[0][0] - time.time())
+            self._tick_call = reactor.callLater(delay, self._tick)
+
+    def _cancel_jobs(self):
+        """Cancel the pending scheduler tick"""
+        if self._tick_call and self._tick_call.active():
+            self._tick_call.cancel()
+        self._tick_call = None
+
+    @trading_hours_only
     def schedule_pnl_report(self):
         """Schedule PnL report"""
-        print(f"[{self.process_name}] Schedule PnL report - Account {self.current_account_id}...")
+        self.log.info(f"Schedule PnL report - Account {self.current_account_id}...")
         if self.connection_completed and self.current_account_id:
-            reactor.callLater(0, self.send_hourly_pnl_list_req)
+            self._queue_request(self.send_hourly_pnl_list_req)
 
+    @trading_hours_only
     def schedule_daily_deal_report(self):
         """Schedule daily deal report"""
-        print(f"[{self.process_name}] Schedule daily deal report - Account {self.current_account_id}...")
+        self.log.info(f"Schedule daily deal report - Account {self.current_account_id}...")
         if self.connection_completed and self.current_account_id:
-            reactor.callLater(0, self.send_daily_deal_list_req)
+            self._queue_request(self.send_daily_deal_list_req)
 
     def schedule_weekly_deal_report(self):
         """Schedule weekly deal report"""
-        print(f"[{self.process_name}] Schedule weekly deal report - Account {self.current_account_id}...")
+        self.log.info(f"Schedule weekly deal report - Account {self.current_account_id}...")
         if self.connection_completed and self.current_account_id:
-            reactor.callLater(0, self.send_weekly_deal_list_req)
+            self._queue_request(self.send_weekly_deal_list_req)
+
+    def _queue_request(self, send_request):
+        """Queue a report request, to be sent with any others queued in the same tick"""
+        self._pending.append(send_request)
+        if self._flush_pending_call is None:
+            self._flush_pending_call = reactor.callLater(0, self._flush_pending)
+
+    def _flush_pending(self):
+        """Send all queued report requests without waiting for each response"""
+        self._flush_pending_call = None
+        while self._pending:
+            self._pending.popleft()()
+
+    def _next_client_msg_id(self, kind):
+        """clientMsgId that lets the response be matched back to its request"""
+        return f"{kind}-{next(self._client_msg_ids)}"
 
     def send_hourly_pnl_list_req(self):
         """Send hourly PnL report"""
-        print(f"[{self.process_name}] Sending hourly PnL report - Account {self.current_account_id}...")
+        self.log.info(f"Sending hourly PnL report - Account {self.current_account_id}...")
         # Request current PnL data
         self.send_proto_oa_get_position_unrealized_pnl_req()
 
     def send_daily_deal_list_req(self):
         """Send daily deal report for closed positions"""
-        print(f"[{self.process_name}] Sending daily deal report - Account {self.current_account_id}...")
+        self.log.info(f"Sending daily deal report - Account {self.current_account_id}...")
 
         # Calculate timestamps for previous day (00:00 to 23:59)
         yesterday = datetime.datetime.now() - datetime.timedelta(days=1)
@@ -319,11 +761,13 @@ class CTraderAsyncClient:
 
         # Request deal list data
         self.deal_list_data = None
-        self.send_proto_oa_deal_list_req(from_timestamp, to_timestamp)
+        client_msg_id = self._next_client_msg_id("daily")
+        self._deal_requests[client_msg_id] = ("daily", start_of_day)
+        self.send_proto_oa_deal_list_req(from_timestamp, to_timestamp, client_msg_id)
 
     def send_weekly_deal_list_req(self):
         """Send weekly deal report for closed positions"""
-        print(f"[{self.process_name}] Sending weekly deal report - Account {self.current_account_id}...")
+        self.log.info(f"Sending weekly deal report - Account {self.current_account_id}...")
         # Current time: Friday 21:15 PM
         now = datetime.datetime.now()
 
@@ -338,417 +782,530 @@ class CTraderAsyncClient:
         from_timestamp = int(last_sunday.timestamp() * 1_000)
         to_timestamp = int(last_friday.timestamp() * 1_000)
 
-        print(f"Last Sunday 21:00 PM UTC 0: {from_timestamp}")
-        print(f"Last Friday 21:00 PM UTC 0: {to_timestamp}")
+        self.log.info(f"Last Sunday 21:00 PM UTC 0: {from_timestamp}")
+        self.log.info(f"Last Friday 21:00 PM UTC 0: {to_timestamp}")
         # Store week range for the report
         self.weekly_report_start = last_sunday
         self.weekly_report_end = last_friday
 
         # Request deal list data
         self.deal_list_data = None
-        self.is_weekly_report = True  # Flag to identify this is weekly report
-        self.send_proto_oa_deal_list_req(from_timestamp, to_timestamp)
+        client_msg_id = self._next_client_msg_id("weekly")
+        self._deal_requests[client_msg_id] = ("weekly", None)  # Identifies this as the weekly report
+        self.send_proto_oa_deal_list_req(from_timestamp, to_timestamp, client_msg_id)
+
+    def start(self):
+        """Initialize the client and start its service on the reactor"""
+        self.log.info(f"Starting client for account {self.current_account_id}")
+        self.initialize()
+
+        # Start the client service
+        self.client.startService()
 
     def run(self):
         """Main run method to start the client"""
         try:
-            print(f"[{self.process_name}] Starting client for account {self.current_account_id}")
-            self.initialize()
-
-            # Start the client service
-            self.client.startService()
+            self.start()
 
             # Start the reactor (this will block until stopped)
             reactor.run(installSignalHandlers=False)
 
         except Exception as e:
-            print(f"[{self.process_name}] Error in run method: {e}")
+            self.log.error(f"Error in run method: {e}")
             raise
         finally:
             # Cleanup
-            if self.scheduler_task and self.scheduler_task.running:
-                self.scheduler_task.stop()
+            self._cancel_jobs()
             if self.client:
                 self.client.stopService()
 
-    def stop(self):
-        """Stop the client"""
-        print(f"[{self.process_name}] Stopping client...")
+    def stop(self, stop_reactor=True):
+        """Stop the client, and the reactor unless other clients still share it"""
+        self.log.info("Stopping client...")
         self.shutdown_event.set()
-        if self.scheduler_task and self.scheduler_task.running:
-            self.scheduler_task.stop()
+        self._cancel_jobs()
         if self.client:
             self.client.stopService()
-        reactor.callLater(0, reactor.stop)
+        if stop_reactor:
+            reactor.callLater(0, reactor.stop)
 
     #TELEGRAM MESSAGE HANDLER
     def send_telegram_message(self, message):
-        """Send message to Telegram"""
-        print(f"[{self.process_name}] Telegram message: {message}")
-
-        start_telegram = datetime.datetime.now()
-        try:
-            url = f"https://api.telegram.org/bot{self.telegram_bot_token}/sendMessage"
-            payload = {
-                'chat_id': self.telegram_chat_id,
-                'text': message,
-                'parse_mode': 'HTML'
-            }
-            # response = requests.post(url, json=payload, timeout=10)
-            response = self.session.post(url, json=payload, timeout=10)
-            if response.status_code != 200:
-                print(f"[{self.process_name}] Failed to send telegram message: {response.text}")
-            print(f"[{self.process_name}] Telegram message sent in {(datetime.datetime.now() - start_telegram).total_seconds():.3f} seconds")
-        except Exception as e:
-            print(f"[{self.process_name}] Error sending telegram message: {e}")
+        """Queue message for Telegram, sent by the next _flush_tg (safe from any thread)"""
+        self.log.info(f"Telegram message: {message}")
+        with self._tg_lock:
+            self._tg_queue.append(message)
+            arm = not self._tg_flush_armed
+            self._tg_flush_armed = True
+        if arm:
+            # Report threads may queue too, so the timer is armed on the reactor thread
+            reactor.callFromThread(self._arm_tg_flush)
+
+    def _arm_tg_flush(self):
+        """Flush after TELEGRAM_FLUSH_INTERVAL, coalescing whatever is queued by then"""
+        if self._tg_flush_call is None or not self._tg_flush_call.active():
+            self._tg_flush_call = reactor.callLater(TELEGRAM_FLUSH_INTERVAL, self._flush_tg)
+
+    def _flush_tg(self):
+        """Send queued messages, joined into as few sendMessage calls as possible"""
+        if self._tg_flush_call is not None and self._tg_flush_call.active():
+            self._tg_flush_call.cancel()
+        self._tg_flush_call = None
+        with self._tg_lock:
+            self._tg_flush_armed = False
+            if not self._tg_queue:
+                return
+            messages = self._tg_queue
+            self._tg_queue = []
+
+        # Pack messages into chunks within Telegram's message length limit
+        chunks = []
+        buf = []
+        buf_len = 0
+        for message in messages:
+            if buf and buf_len + len(message) + 2 > TELEGRAM_MAX_MESSAGE_LENGTH:
+                chunks.append(buf)
+                buf = []
+                buf_len = 0
+            buf_len += len(message) + (2 if buf else 0)
+            buf.append(message)
+        if buf:
+            chunks.append(buf)
+
+        for chunk in chunks:
+            # A send that raises fails only its own Deferred, not the rest of the flush
+            deferred = defer.maybeDeferred(self._post_telegram_message, "\n\n".join(chunk))
+            if len(chunk) > 1:
+                deferred.addCallback(self._on_tg_batch_response, chunk)
+            deferred.addErrback(self.on_error)
+            self._tg_inflight.add(deferred)
+            deferred.addBoth(self._on_tg_done, deferred)
+
+    def _on_tg_done(self, result, deferred):
+        """A flushed send (including its retries) has finished"""
+        self._tg_inflight.discard(deferred)
+        return result
+
+    def _drain_tg(self):
+        """Before reactor shutdown: send what's queued and wait for every send in flight"""
+        # Let reports already submitted finish building so they're in the final flush
+        self._report_pool.shutdown(wait=True)
+        self._flush_tg()
+        # Close idle connections only once the last sends have handed theirs back
+        drained = defer.DeferredList(list(self._tg_inflight))
+        drained.addCallback(lambda _: telegram_pool.closeCachedConnections())
+        return drained
+
+    def _on_tg_batch_response(self, response, chunk):
+        """Joined message rejected, retry each message on its own"""
+        if response.code == 400:
+            resends = [defer.maybeDeferred(self._post_telegram_message, message).addErrback(self.on_error)
+                       for message in chunk]
+            return defer.DeferredList(resends).addCallback(lambda _: response)
+        return response
+
+    def _post_telegram_message(self, text, attempt=0):
+        """Send one sendMessage request to Telegram without blocking the reactor"""
+        start_telegram = time.monotonic()
+        body = _json_bytes({
+            'chat_id': self.telegram_chat_id,
+            'text': text,
+            'parse_mode': 'HTML'
+        })
+
+        def on_response(response):
+            if response.code in TELEGRAM_RETRY_STATUS and attempt < TELEGRAM_MAX_RETRIES:
+                retry_after = response.headers.getRawHeaders(b'retry-after', [None])[0]
+                try:
+                    delay = float(retry_after)
+                except (TypeError, ValueError):
+                    delay = TELEGRAM_RETRY_BACKOFF * (2 ** attempt)
+                self.log.warning(f"Telegram returned {response.code}, retrying in {delay:.2f} seconds")
+                # Read the body so the connection goes back to the pool
+                treq.content(response).addErrback(self.on_error)
+                return task.deferLater(reactor, delay, self._post_telegram_message, text, attempt + 1)
+
+            if response.code != 200:
+                treq.text_content(response).addCallback(
+                    lambda body: self.log.error(f"Failed to send telegram message: {body}"))
+            self.log.info(f"Telegram message sent in {time.monotonic() - start_telegram:.3f} seconds")
+            return response
+
+        deferred = treq.post(self._tg_url, data=body, headers=TELEGRAM_JSON_HEADERS, pool=telegram_pool, timeout=5)
+        deferred.addCallback(on_response)
+        return deferred
 
     def send_pnl_telegram_report(self):
         """Send PnL data as formatted table to Telegram"""
-        if not self.is_trading_hours():
-            print(f"[{self.process_name}] Outside trading hours - PnL report not sent for A/c {self.current_account_id}")
-            return
-
         if not self.position_pnl_data:
             return
 
-        current_time = datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        current_time = _now_str()
 
         # Create table header
-        telegram_msg = f"📊 <b>Open Position Report {self.host_type.capitalize()} A/c {self.current_account_id}</b>\n"
-        telegram_msg += f"⏰ Time: {current_time}\n\n"
-        telegram_msg += f"<pre>"
-        telegram_msg += f"{'PID':<10} {'Gross':<9} {'Net':<9}\n"
-        telegram_msg += f"{'-'*10} {'-'*9} {'-'*9}\n"
+        parts = [f"📊 <b>Open Position Report {self._account_label}</b>\n"]
+        parts.append(f"⏰ Time: {current_time}\n\n")
+        parts.append(f"<pre>")
+        parts.append(_PNL_HEADER)
+        parts.append(_PNL_SEP)
 
         total_gross_pnl = 0
         total_net_pnl = 0
 
         # Add each position
+        scale = _POW10[self.money_digits]
         for position in self.position_pnl_data:
             position_id = position.positionId
-            gross_pnl = position.grossUnrealizedPnL / (10 ** self.money_digits)
-            net_pnl = position.netUnrealizedPnL / (10 ** self.money_digits)
+            gross_pnl = position.grossUnrealizedPnL / scale
+            net_pnl = position.netUnrealizedPnL / scale
 
             total_gross_pnl += gross_pnl
             total_net_pnl += net_pnl
 
-            telegram_msg += f"{position_id:<10} {gross_pnl:<9.2f} {net_pnl:<9.2f}\n"
+            parts.append(_PNL_ROW_FMT.format(position_id, gross_pnl, net_pnl))
 
         # Add totals
-        telegram_msg += f"{'-'*10} {'-'*9} {'-'*9}\n"
-        telegram_msg += f"{'TOTAL':<10} {total_gross_pnl:<9.2f} {total_net_pnl:<9.2f}\n"
-        telegram_msg += f"</pre>"
+        parts.append(_PNL_SEP)
+        parts.append(_PNL_TOTAL_FMT.format(total_gross_pnl, total_net_pnl))
+        parts.append(f"</pre>")
 
         # Add summary
-        telegram_msg += f"\n💰 <b>SUMMARY</b>\n"
-        telegram_msg += f"📈 Total Gross: {total_gross_pnl:.2f}\n"
-        telegram_msg += f"📉 Total Net: {total_net_pnl:.2f}\n"
-        telegram_msg += f"🔢 Open Positions: {len(self.position_pnl_data)}"
-
-        self.send_telegram_message(telegram_msg)
+        parts.append(f"\n💰 <b>SUMMARY</b>\n")
+        parts.append(f"📈 Total Gross: {total_gross_pnl:.2f}\n")
+        parts.append(f"📉 Total Net: {total_net_pnl:.2f}\n")
+        parts.append(f"🔢 Open Positions: {len(self.position_pnl_data)}")
 
-    def send_deal_telegram_report(self, start_date):
-        """Send deal data as formatted table to Telegram"""
-        if not self.is_trading_hours():
-            print(f"[{self.process_name}] Outside trading hours - Deals report not sent for A/c {self.current_account_id}")
-            return
+        self.send_telegram_message("".join(parts))
 
-        if not self.deal_list_data:
+    def send_deal_telegram_report(self, start_date, deals):
+        """Send deal data as formatted table to Telegram (runs in the report pool)"""
+        if not deals:
             return
 
-        # Filter only closed deals (deals with closePositionDetail)
-        closed_deals_1 = [deal for deal in self.deal_list_data if hasattr(deal, 'closePositionDetail') and hasattr(deal.closePositionDetail, 'balance')]
-
-        closed_deals = [deal for deal in closed_deals_1 if deal.closePositionDetail.balance > 0]
-
-        if len(closed_deals) == 0:
-            self.send_empty_deal_telegram_report(start_date)
-            return
+        now_str = _now_str()
 
         # Create table header with Deal ID column
-        telegram_msg = f"📊 <b>Daily Deal Report {self.host_type.capitalize()} A/c {self.current_account_id}</b>\n"
-        telegram_msg += f"📅 Date: {start_date.strftime('%Y-%m-%d')}\n"
-        telegram_msg += f"⏰ Report Time: {datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n\n"
-        telegram_msg += f"<pre>"
-        telegram_msg += f"{'DID':<10} {'Symbol':<7} {'Side':<5} {'Time':<9} {'Vol':<5} {'Swap':<6} {'Comm':<6} {'Net':<7} {'Bal':<9}\n"
-        telegram_msg += f"{'-'*10} {'-'*7} {'-'*5} {'-'*9} {'-'*5} {'-'*6} {'-'*6} {'-'*7} {'-'*9}\n"
+        parts = [f"📊 <b>Daily Deal Report {self._account_label}</b>\n"]
+        parts.append(f"📅 Date: {start_date.date().isoformat()}\n")
+        parts.append(f"⏰ Report Time: {now_str}\n\n")
+        parts.append(f"<pre>")
+        parts.append(_DEAL_HEADER)
+        parts.append(_DEAL_SEP)
 
         total_swap = 0
         total_commission = 0
         total_net_profit = 0
         current_balance = 0  # You might need to get this from your account data
 
-        # Process all deals first to minimize loop overhead
-        deal_rows = []
+        # Filter closed deals (deals with closePositionDetail) and stream their rows into parts in one pass
+        closed_deals_count = 0
+
+        # Resolve each symbol's name and volume digits once, not once per deal
+        symbols = {symbol_id: (self.get_symbol_name(symbol_id), _VOLUME_DIGITS.get(symbol_id, 5))
+                   for symbol_id in {deal.symbolId for deal in deals}}
+
+        # Bound once so the per-deal loop skips the attribute lookups
+        fromtimestamp = datetime.datetime.fromtimestamp
+        add_part = parts.append
+
+        for deal in deals:
+            if not deal.HasField('closePositionDetail'):
+                continue
+            close_detail = deal.closePositionDetail
+            if close_detail.balance <= 0:
+                continue
+            closed_deals_count += 1
 
-        for deal in closed_deals:
             # Deal ID
-            deal_id = getattr(deal, 'dealId', 'N/A')
+            deal_id = deal.dealId
 
             # Extract symbol (you may need to adjust this based on your data structure)
-            symbol = self.get_symbol_name(deal.symbolId)
+            symbol, volume_digits = symbols[deal.symbolId]
 
             # Opening direction
-            direction = 'Sell' if deal.tradeSide == 1 else 'Buy'  # Adjust logic as needed
+            direction = DEAL_DIRECTION[deal.tradeSide == 1]  # Adjust logic as needed
 
             # Closing time
-            close_detail = deal.closePositionDetail
             close_time = deal.executionTimestamp
             if close_time != 'N/A':
                 # Convert timestamp to readable format (adjust based on your timestamp format)
                 try:
                     if isinstance(close_time, int):
-                        close_time = datetime.datetime.fromtimestamp(close_time/1000).strftime('%H:%M:%S')
+                        close_time = fromtimestamp(close_time/1000).time().isoformat('seconds')
                     else:
                         close_time = str(close_time)[:16]  # Truncate if too long
                 except:
                     close_time = 'N/A'
 
             # Usage in the code:
-            volume = self.calculate_volume(deal.symbolId, deal.volume, close_detail.moneyDigits)
+            md = close_detail.moneyDigits
+            scale = _POW10[md]
+            volume = deal.volume / _POW10[md + volume_digits]  # Same as calculate_volume, without the per-deal lookups
 
             # Swap
-            swap = close_detail.swap / (10 ** close_detail.moneyDigits)
+            swap = close_detail.swap / scale
 
             # Commission
-            commission = close_detail.commission / (10 ** close_detail.moneyDigits)
+            commission = close_detail.commission / scale
 
             # Net profit
-            gross_profit = close_detail.grossProfit / (10 ** close_detail.moneyDigits)
+            gross_profit = close_detail.grossProfit / scale
             net_profit = gross_profit + swap + commission
 
             # Balance (you might need to calculate running balance)
-            current_balance = close_detail.balance / (10 ** close_detail.moneyDigits)
+            current_balance = close_detail.balance / scale
 
             total_swap += swap
             total_commission += commission
             total_net_profit += net_profit
 
-            deal_rows.append(f"{deal_id:<10} {symbol:<7} {direction:<5} {close_time:<9} {volume:<5.2f} {swap:<6.2f} {commission:<6.2f} {net_profit:<7.2f} {current_balance:<9.2f}")
+            add_part(_DEAL_ROW_FMT.format(deal_id, symbol, direction, close_time, volume, swap, commission, net_profit, current_balance))
 
-        # Join all deal rows at once
-        telegram_msg += "\n".join(deal_rows) + "\n"
+        if closed_deals_count == 0:
+            self.send_empty_deal_telegram_report(start_date)
+            return
 
         # Add totals
-        telegram_msg += f"{'-'*10} {'-'*7} {'-'*5} {'-'*9} {'-'*5} {'-'*6} {'-'*6} {'-'*7} {'-'*9}\n"
-        telegram_msg += f"{'TOTAL':<10} {'':<7} {'':<5} {'':<9} {'':<5} {total_swap:<6.2f} {total_commission:<6.2f} {total_net_profit:<7.2f} {current_balance:<9.2f}\n"
-        telegram_msg += f"</pre>"
+        parts.append(_DEAL_SEP)
+        parts.append(_DEAL_TOTAL_FMT.format(total_swap, total_commission, total_net_profit, current_balance))
+        parts.append(f"</pre>")
 
         # Add summary
-        telegram_msg += f"\n💰 <b>SUMMARY</b>\n"
-        telegram_msg += f"🔄 Total Swap: {total_swap:.2f}\n"
-        telegram_msg += f"💸 Total Commission: {total_commission:.2f}\n"
-        telegram_msg += f"💵 Total Net Profit: {total_net_profit:.2f}\n"
-        telegram_msg += f"💰 Final Balance: {current_balance:.2f}\n"
-        telegram_msg += f"🔢 Closed Deals: {len(closed_deals)}"
-
-        self.send_telegram_message(telegram_msg)
-
-    def send_weekly_deal_telegram_report(self):
-        """Send weekly deal data as formatted table to Telegram"""
-        if not self.deal_list_data:
+        parts.append(f"\n💰 <b>SUMMARY</b>\n")
+        parts.append(f"🔄 Total Swap: {total_swap:.2f}\n")
+        parts.append(f"💸 Total Commission: {total_commission:.2f}\n")
+        parts.append(f"💵 Total Net Profit: {total_net_profit:.2f}\n")
+        parts.append(f"💰 Final Balance: {current_balance:.2f}\n")
+        parts.append(f"🔢 Closed Deals: {closed_deals_count}")
+
+        self.send_telegram_message("".join(parts))
+
+    def send_weekly_deal_telegram_report(self, deals):
+        """Send weekly deal data as formatted table to Telegram (runs in the report pool)"""
+        if not deals:
             return
 
-        # Filter only closed deals
-        closed_deals_1 = [deal for deal in self.deal_list_data if hasattr(deal, 'closePositionDetail') and hasattr(deal.closePositionDetail, 'balance')]
-        closed_deals = [deal for deal in closed_deals_1 if deal.closePositionDetail.balance > 0]
-
-        if len(closed_deals) == 0:
-            self.send_empty_weekly_deal_telegram_report()
-            return
+        now_str = _now_str()
 
         # Create table header
-        telegram_msg = f"📊 <b>Weekly Deal Report {self.host_type.capitalize()} A/c {self.current_account_id}</b>\n"
-        telegram_msg += f"📅 Week: {self.weekly_report_start.strftime('%Y-%m-%d %H:%M:%S')} to {self.weekly_report_end.strftime('%Y-%m-%d %H:%M:%S')}\n"
-        telegram_msg += f"⏰ Report Time: {datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n\n"
-        telegram_msg += f"<pre>"
-        telegram_msg += f"{'Date':<10} {'Symbol':<7} {'Side':<5} {'Vol':<5} {'Swap':<6} {'Comm':<6} {'Net':<7}\n"
-        telegram_msg += f"{'-'*10} {'-'*7} {'-'*5} {'-'*5} {'-'*6} {'-'*6} {'-'*7}\n"
-
-        total_swap = 0
-        total_commission = 0
-        total_net_profit = 0
-        daily_summaries = {}
-
-        # Group deals by day and calculate totals
-        for deal in closed_deals:
+        parts = [f"📊 <b>Weekly Deal Report {self._account_label}</b>\n"]
+        parts.append(f"📅 Week: {self.weekly_report_start.isoformat(' ', 'seconds')} to {self.weekly_report_end.isoformat(' ', 'seconds')}\n")
+        parts.append(f"⏰ Report Time: {now_str}\n\n")
+        parts.append(f"<pre>")
+        parts.append(_WEEKLY_HEADER)
+        parts.append(_WEEKLY_SEP)
+
+        # Raw integer totals keyed by moneyDigits, scaled only when printed
+        raw_totals = {}  # md -> [swap, commission, net]
+        daily_summaries = {}  # date -> [deals, {md: net}]
+
+        # Filter closed deals, group them by day, calculate totals and stream rows into parts in one pass
+        closed_deals_count = 0
+
+        # Resolve each symbol's name and volume digits once, not once per deal
+        symbols = {symbol_id: (self.get_symbol_name(symbol_id), _VOLUME_DIGITS.get(symbol_id, 5))
+                   for symbol_id in {deal.symbolId for deal in deals}}
+
+        # Bound once so the per-deal loop skips the attribute lookups
+        fromtimestamp = datetime.datetime.fromtimestamp
+        add_part = parts.append
+
+        for deal in deals:
+            if not deal.HasField('closePositionDetail'):
+                continue
             close_detail = deal.closePositionDetail
+            if close_detail.balance <= 0:
+                continue
+            closed_deals_count += 1
 
             # Extract deal date
-            deal_date = datetime.datetime.fromtimestamp(deal.executionTimestamp/1000).strftime('%m-%d')
+            deal_date = fromtimestamp(deal.executionTimestamp/1000).date().isoformat()[5:]  # MM-DD
 
             # Extract symbol
-            symbol = self.get_symbol_name(deal.symbolId)
+            symbol, volume_digits = symbols[deal.symbolId]
 
             # Opening direction
-            direction = 'Sell' if deal.tradeSide == 1 else 'Buy'
+            direction = DEAL_DIRECTION[deal.tradeSide == 1]
 
             # Volume
-            volume = self.calculate_volume(deal.symbolId, deal.volume, close_detail.moneyDigits)
+            md = close_detail.moneyDigits
+            scale = _POW10[md]
+            volume = deal.volume / _POW10[md + volume_digits]  # Same as calculate_volume, without the per-deal lookups
 
             # Swap, Commission, Net profit
-            swap = close_detail.swap / (10 ** close_detail.moneyDigits)
-            commission = close_detail.commission / (10 ** close_detail.moneyDigits)
-            gross_profit = close_detail.grossProfit / (10 ** close_detail.moneyDigits)
-            net_profit = gross_profit + swap + commission
+            raw_swap = close_detail.swap
+            raw_commission = close_detail.commission
+            raw_net = close_detail.grossProfit + raw_swap + raw_commission
 
-            total_swap += swap
-            total_commission += commission
-            total_net_profit += net_profit
+            totals = raw_totals.get(md)
+            if totals is None:
+                totals = raw_totals[md] = [0, 0, 0]
+            totals[0] += raw_swap
+            totals[1] += raw_commission
+            totals[2] += raw_net
 
             # Add to daily summary
-            if deal_date not in daily_summaries:
-                daily_summaries[deal_date] = {'deals': 0, 'net_profit': 0}
-            daily_summaries[deal_date]['deals'] += 1
-            daily_summaries[deal_date]['net_profit'] += net_profit
+            bucket = daily_summaries.get(deal_date)
+            if bucket is None:
+                bucket = daily_summaries[deal_date] = [0, {}]
+            bucket[0] += 1
+            bucket[1][md] = bucket[1].get(md, 0) + raw_net
+
+            # Displayed row values are scaled per field, as the report always did
+            swap = raw_swap / scale
+            commission = raw_commission / scale
+            net_profit = close_detail.grossProfit / scale + swap + commission
+            add_part(_WEEKLY_ROW_FMT.format(deal_date, symbol, direction, volume, swap, commission, net_profit))
+
+        if closed_deals_count == 0:
+            self.send_empty_weekly_deal_telegram_report()
+            return
 
-            telegram_msg += f"{deal_date:<10} {symbol:<7} {direction:<5} {volume:<5.2f} {swap:<6.2f} {commission:<6.2f} {net_profit:<7.2f}\n"
+        total_swap = sum(totals[0] / _POW10[md] for md, totals in raw_totals.items())
+        total_commission = sum(totals[1] / _POW10[md] for md, totals in raw_totals.items())
+        total_net_profit = sum(totals[2] / _POW10[md] for md, totals in raw_totals.items())
 
         # Add totals
-        telegram_msg += f"{'-'*10} {'-'*7} {'-'*5} {'-'*5} {'-'*6} {'-'*6} {'-'*7}\n"
-        telegram_msg += f"{'TOTAL':<10} {'':<7} {'':<5} {'':<5} {total_swap:<6.2f} {total_commission:<6.2f} {total_net_profit:<7.2f}\n"
-        telegram_msg += f"</pre>"
+        parts.append(_WEEKLY_SEP)
+        parts.append(_WEEKLY_TOTAL_FMT.format(total_swap, total_commission, total_net_profit))
+        parts.append(f"</pre>")
 
         # Add daily breakdown
-        telegram_msg += f"\n📈 <b>DAILY BREAKDOWN</b>\n"
-        for date, summary in sorted(daily_summaries.items()):
-            telegram_msg += f"📅 {date}: {summary['deals']} deals, Net P&L: {summary['net_profit']:.2f}\n"
+        parts.append(f"\n📈 <b>DAILY BREAKDOWN</b>\n")
+        for date, (deal_count, raw_net_by_md) in sorted(daily_summaries.items()):
+            net_profit = sum(raw_net / _POW10[md] for md, raw_net in raw_net_by_md.items())
+            parts.append(f"📅 {date}: {deal_count} deals, Net P&L: {net_profit:.2f}\n")
 
         # Add summary
-        telegram_msg += f"\n💰 <b>WEEKLY SUMMARY</b>\n"
-        telegram_msg += f"🔄 Total Swap: {total_swap:.2f}\n"
-        telegram_msg += f"💸 Total Commission: {total_commission:.2f}\n"
-        telegram_msg += f"💵 Total Net Profit: {total_net_profit:.2f}\n"
-        telegram_msg += f"🔢 Total Closed Deals: {len(closed_deals)}\n"
-        telegram_msg += f"🔢 Trading Days: {len(daily_summaries)}"
+        parts.append(f"\n💰 <b>WEEKLY SUMMARY</b>\n")
+        parts.append(f"🔄 Total Swap: {total_swap:.2f}\n")
+        parts.append(f"💸 Total Commission: {total_commission:.2f}\n")
+        parts.append(f"💵 Total Net Profit: {total_net_profit:.2f}\n")
+        parts.append(f"🔢 Total Closed Deals: {closed_deals_count}\n")
+        parts.append(f"🔢 Trading Days: {len(daily_summaries)}")
 
-        self.send_telegram_message(telegram_msg)
+        self.send_telegram_message("".join(parts))
 
     def send_empty_deal_telegram_report(self, start_of_day):
         """Send empty deal report when no closed deals are found"""
-        if not self.is_trading_hours():
-            print(f"[{self.process_name}] Outside trading hours - Empty Deals report not sent for A/c {self.current_account_id}")
-            return
-
-        telegram_msg = f"📊 <b>Daily Deal Report {self.host_type.capitalize()} A/c {self.current_account_id}</b>\n"
-        telegram_msg += f"📅 Date: {start_of_day.strftime('%Y-%m-%d')}\n"
-        telegram_msg += f"⏰ Report Time: {datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n\n"
-        telegram_msg += f"<pre>"
-        telegram_msg += f"✅ No closed deals found for this period."
-        telegram_msg += f"</pre>"
-        self.send_telegram_message(telegram_msg)
-
-    def send_empty_deal_telegram_report(self, start_of_day):
-        """Send empty deal report when no closed deals are found"""
-        if not self.is_trading_hours():
-            print(f"[{self.process_name}] Outside trading hours - Empty Deals report not sent for A/c {self.current_account_id}")
-            return
-
-        telegram_msg = f"📊 <b>Daily Deal Report {self.host_type.capitalize()} A/c {self.current_account_id}</b>\n"
-        telegram_msg += f"📅 Date: {start_of_day.strftime('%Y-%m-%d')}\n"
-        telegram_msg += f"⏰ Report Time: {datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n\n"
-        telegram_msg += f"<pre>"
-        telegram_msg += f"✅ No closed deals found for this period."
-        telegram_msg += f"</pre>"
-        self.send_telegram_message(telegram_msg)
+        self.send_telegram_message(_EMPTY_DEAL_FMT.format(label=self._account_label, date=start_of_day.date().isoformat(), now=_now_str()))
 
     def send_empty_weekly_deal_telegram_report(self):
         """Send empty weekly deal report when no closed deals are found"""
-        telegram_msg = f"📊 <b>Weekly Deal Report {self.host_type.capitalize()} A/c {self.current_account_id}</b>\n"
-        telegram_msg += f"📅 Week: {self.weekly_report_start.strftime('%Y-%m-%d %H:%M:%S')} to {self.weekly_report_end.strftime('%Y-%m-%d %H:%M:%S')}\n"
-        telegram_msg += f"⏰ Report Time: {datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n\n"
-        telegram_msg += f"<pre>"
-        telegram_msg += f"✅ No closed deals found for this week."
-        telegram_msg += f"</pre>"
-        self.send_telegram_message(telegram_msg)
+        self.send_telegram_message(_EMPTY_WEEKLY_FMT.format(
+            label=self._account_label,
+            start=self.weekly_report_start.isoformat(' ', 'seconds'),
+            end=self.weekly_report_end.isoformat(' ', 'seconds'),
+            now=_now_str()))
 
     def send_empty_pnl_telegram_report(self):
         """Send empty PnL report when no open positions are found"""
-        if not self.is_trading_hours():
-            print(f"[{self.process_name}] Outside trading hours - Empty PnL report not sent for A/c {self.current_account_id}")
-            return
-
-        telegram_msg = f"📊 <b>Open Position Report {self.host_type.capitalize()} A/c {self.current_account_id}</b>\n"
-        telegram_msg += f"⏰ Time: {datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n\n"
-        telegram_msg += f"<pre>"
-        telegram_msg += f"🎯 No Open Position"
-        telegram_msg += f"</pre>"
-        self.send_telegram_message(telegram_msg)
+        self.send_telegram_message(_EMPTY_PNL_FMT.format(label=self._account_label, now=_now_str()))
 
     def is_trading_hours(self):
-        now = datetime.datetime.now()
-
-        current_weekday = now.weekday()  # 0=Monday, 6=Sunday
-        current_time = now.time()
-
-        # Trading hours
-        market_open = datetime.time(22, 2, 0)    # 22:02:00
-        market_close_friday = datetime.time(20, 57, 0)  # 20:57:00
-
-        if current_weekday == 6:  # Sunday
-            # Sunday trading starts at 22:02:00
-            return current_time >= market_open
-
-        elif current_weekday in [0, 1, 2, 3]:  # Monday to Thursday
-            # Trading ends at 20:59:00, then starts again at 22:02:00
-            return True
-
-        elif current_weekday == 4:  # Friday
-            # Friday trading ends at 20:57:00
-            return current_time <= market_close_friday
-
-        else:  # Saturday (5)
-            return False
+        now = time.localtime()
+        return _TRADING_MINUTES[now.tm_wday * 1440 + now.tm_hour * 60 + now.tm_min] == 1
 
     def get_symbol_name(self, symbol_id):
-        symbol_map = {
-            5: "AUDUSD",
-            12: "NZDUSD",
-            41: "XAUUSD",
-            10026: "BTCUSD"
-        }
-        return symbol_map.get(symbol_id, 'N/A')
+        return _SYMBOL_MAP.get(symbol_id, 'N/A')
 
     def calculate_volume(self, symbol_id, volume, money_digits):
-        digits = {
-            41: 2,        # XAUUSD
-            10026: 0,     # BTCUSD
-        }
-        # other symbols default to 5 digits
-        return volume / (10 ** (money_digits +  digits.get(symbol_id, 5)))
+        return volume / _POW10[money_digits + _VOLUME_DIGITS.get(symbol_id, 5)]
 
-def run_client_process(account_id):
+def run_client_process(account_id, auth_slot=None, log_queue=None, shutdown=None):
     """Run a single client in its own process"""
     client = None
+    log_listener = setup_logging(log_queue)
+    log = logging.getLogger(f"Process-{account_id}")
     try:
-        print(f"Starting process for account {account_id}")
-        client = CTraderAsyncClient(account_id, f"Process-{account_id}")
+        log.info(f"Starting process for account {account_id}")
+        client = CTraderAsyncClient(account_id, f"Process-{account_id}", auth_slot)
 
-        # Set up signal handlers for graceful shutdown
+        # Set up signal handlers for graceful shutdown; the stop itself runs
+        # on the reactor, not inside the interrupted frame
         def signal_handler(signum, frame):
-            print(f"Received signal {signum} for account {account_id}")
+            log.info(f"Received signal {signum} for account {account_id}")
             if client:
-                client.stop()
+                reactor.callFromThread(client.stop)
 
-        import signal
         signal.signal(signal.SIGINT, signal_handler)
         signal.signal(signal.SIGTERM, signal_handler)
 
+        # Stop cleanly once the parent broadcasts shutdown
+        if shutdown is not None:
+            def check_shutdown():
+                if shutdown.is_set():
+                    log.info(f"Shutdown requested for account {account_id}")
+                    shutdown_watch.stop()
+                    client.stop()
+
+            shutdown_watch = task.LoopingCall(check_shutdown)
+            shutdown_watch.start(SHUTDOWN_POLL_INTERVAL, now=False)
+
         # Start the client
         client.run()
 
     except KeyboardInterrupt:
-        print(f"Process for account {account_id} interrupted")
+        log.info(f"Process for account {account_id} interrupted")
     except Exception as e:
-        print(f"Error in process for account {account_id}: {e}")
+        log.error(f"Error in process for account {account_id}: {e}")
         raise
     finally:
         if client:
             client.stop()
+        if log_listener:
+            log_listener.stop()
 
-def main():
-    """Main entry point - start multiple processes"""
-    # Load environment variables
+def run_warm_worker(assignment, auth_slot=None, log_queue=None, shutdown=None):
+    """Wait, with all imports done, for the account this process should run
+
+    A reactor can only run once per process, so each worker serves a single
+    account; None means exit without running one.
+    """
+    try:
+        account_id = assignment.get()
+    except KeyboardInterrupt:
+        return
+    if account_id is None:
+        return
+    run_client_process(account_id, auth_slot, log_queue, shutdown)
+
+def run_clients_single_reactor(account_ids):
+    """Run every account client in this process on one shared reactor"""
+    log_listener = setup_logging()
+    log = logging.getLogger("Main")
+    clients = [CTraderAsyncClient(account_id, f"Client-{account_id}") for account_id in account_ids]
+    try:
+        log.info("Starting single-reactor CTrader clients...")
+        for client in clients:
+            client.start()
+
+        # Start the reactor (this will block until Ctrl+C / SIGTERM)
+        reactor.run()
+
+    except Exception as e:
+        log.error(f"Error in single reactor: {e}")
+        raise
+    finally:
+        for client in clients:
+            client.stop(stop_reactor=False)
+        log.info("All clients stopped")
+        log_listener.stop()
+
+def wait_for_exit(processes, timeout):
+    """Join processes as they exit within a shared timeout; return those still running"""
+    running = {process.sentinel: process for process in processes}
+    deadline = time.monotonic() + timeout
+    while running:
+        ready = wait(list(running), timeout=max(deadline - time.monotonic(), 0))
+        if not ready:
+            break
+        for sentinel in ready:
+            running.pop(sentinel).join()
+    return list(running.values())
+
+def print_env_banner():
+    """Print the loaded environment variables"""
     print("#" * 86)
     print("# Loading environment variables...")
     print("# APP_CLIENT_ID                    :",os.getenv("APP_CLIENT_ID"))
@@ -762,53 +1319,176 @@ def main():
     print("# SCHEDULE_DEALS_REPORT_INTERVAL   :",os.getenv("SCHEDULE_DEALS_REPORT_INTERVAL"))
     print("# SCHEDULE_DEALS_REPORT_TIME       :",os.getenv("SCHEDULE_DEALS_REPORT_TIME"))
     print("# ACCOUNT_ID_LIST                  :",os.getenv("ACCOUNT_ID_LIST"))
+    print("# SINGLE_PROCESS                   :",os.getenv("SINGLE_PROCESS"))
     print("#" * 86)
 
-    account_ids = json.loads(os.getenv("ACCOUNT_ID_LIST"))
+def parse_account_ids(raw):
+    """Account ids from an ACCOUNT_ID_LIST value such as [43911111,43961112]"""
+    return [int(account_id) for account_id in raw.strip().strip("[]").split(",") if account_id.strip()]
+
+def main():
+    """Main entry point - start multiple processes"""
+    # Only the parent prints the banner; account processes get their id as an argument
+    if multiprocessing.parent_process() is None:
+        print_env_banner()
+        if _HOST != _HOST_REQUESTED:
+            print(f"{_HOST_REQUESTED} is not a valid host type. Using demo.")
+
+    account_ids = parse_account_ids(_require_env("ACCOUNT_ID_LIST"))
+
+    # Opt-in: all accounts share one process and reactor instead of one process each
+    if os.getenv("SINGLE_PROCESS", "false").lower() == "true":
+        run_clients_single_reactor(account_ids)
+        return
+
     processes = []
+    # Processes start together; the semaphore keeps auth requests bounded
+    auth_slots = multiprocessing.Semaphore(AUTH_CONCURRENCY)
+
+    # Set once to stop every account process cleanly and in parallel
+    shutdown = multiprocessing.Event()
+
+    # Account processes log into this queue; only the parent writes to stdout
+    log_queue = multiprocessing.Queue(-1)
+    log_listener = start_log_listener(log_queue)
+    setup_logging(log_queue)
+    log = logging.getLogger("Main")
+
+    # SIGTERM takes the same clean shutdown path as Ctrl+C instead of
+    # leaving the account processes orphaned
+    def sigterm_handler(signum, frame):
+        raise KeyboardInterrupt
+
+    signal.signal(signal.SIGTERM, sigterm_handler)
+
+    # Workers are kept as (process, assignment queue, auth slot) for their whole
+    # life: the child unpickles the queue and slot only after it has started
+    # up, and they're unlinked if the parent lets them be garbage collected.
+    running = {}  # sentinel -> (worker, account_id, started at)
+    failures = {}  # account_id -> consecutive crashes
+    restarts = []  # heap of (restart at, account_id)
+    spares = deque()  # idle warm workers
+
+    def start_worker():
+        assignment = multiprocessing.SimpleQueue()
+        auth_slot = AuthSlot(auth_slots)
+        process = multiprocessing.Process(
+            target=run_warm_worker,
+            args=(assignment, auth_slot, log_queue, shutdown),
+            name="CTrader-spare",
+            daemon=True  # Terminated when the parent exits normally; not if it's SIGKILLed
+        )
+        process.start()
+        processes.append(process)
+        return process, assignment, auth_slot
+
+    def start_process(account_id):
+        # Prefer a warm spare that has already paid the import cost
+        while spares:
+            worker = spares.popleft()
+            if worker[0].is_alive():
+                break
+            # A spare that died idle is done with; stop tracking it
+            worker[0].join()
+            processes.remove(worker[0])
+        else:
+            worker = start_worker()
+        process, assignment, auth_slot = worker
+        assignment.put(account_id)
+        process.name = f"CTrader-{account_id}"
+        running[process.sentinel] = (worker, account_id, time.monotonic())
+        log.info(f"Started process for account {account_id} (PID: {process.pid})")
+
+    def refill_spares():
+        while len(spares) < WARM_SPARES:
+            spares.append(start_worker())
+
+    def release_spares():
+        while spares:
+            process, assignment, auth_slot = spares.popleft()
+            if process.is_alive():
+                assignment.put(None)
 
     try:
-        print("Starting multi-process CTrader clients...")
+        log.info("Starting multi-process CTrader clients...")
 
         # Create and start processes
         for account_id in account_ids:
-            process = multiprocessing.Process(
-                target=run_client_process,
-                args=(account_id,),
-                name=f"CTrader-{account_id}"
-            )
-            process.start()
-            processes.append(process)
-            print(f"Started process for account {account_id} (PID: {process.pid})")
-
-            # Small delay between starting processes
-            time.sleep(1)
-
-        # Wait for all processes
-        for process in processes:
-            process.join()
+            start_process(account_id)
+        refill_spares()
+
+        # Supervise: wake as soon as any process exits, restart crashed ones with backoff
+        while running or restarts:
+            timeout = max(restarts[0][0] - time.monotonic(), 0) if restarts else None
+            if running:
+                ready = wait(list(running), timeout=timeout)
+            else:
+                time.sleep(timeout)
+                ready = []
+
+            for sentinel in ready:
+                worker, account_id, started_at = running.pop(sentinel)
+                process, assignment, auth_slot = worker
+                process.join()
+                processes.remove(process)
+                # A process that died mid-auth can't give its slot back itself
+                auth_slot.release_all()
+                log.info(f"Process {process.name} exited (code {process.exitcode})")
+                if process.exitcode == 0:
+                    continue
+
+                if time.monotonic() - started_at > RESTART_BACKOFF_MAX:
+                    failures[account_id] = 0
+                delay = min(2 ** failures.get(account_id, 0), RESTART_BACKOFF_MAX)
+                failures[account_id] = failures.get(account_id, 0) + 1
+                log.warning(f"Restarting process for account {account_id} in {delay}s")
+                heapq.heappush(restarts, (time.monotonic() + delay, account_id))
+
+            now = time.monotonic()
+            while restarts and restarts[0][0] <= now:
+                start_process(heapq.heappop(restarts)[1])
+            if running or restarts:
+                refill_spares()
+
+        release_spares()
 
     except KeyboardInterrupt:
-        print("\nShutting down all processes...")
-        for process in processes:
-            if process.is_alive():
-                process.terminate()
-                process.join(timeout=5)
-                if process.is_alive():
-                    print(f"Force killing process {process.pid}")
-                    process.kill()
-                    process.join()
-        print("All processes terminated")
+        log.info("Shutting down all processes...")
+        shutdown.set()
+        release_spares()
+
+        # Clean shutdown in parallel, then terminate() and kill() only the stragglers
+        alive = wait_for_exit([process for process in processes if process.is_alive()], SHUTDOWN_GRACE)
+        for process in alive:
+            process.terminate()
+        alive = wait_for_exit(alive, SHUTDOWN_GRACE)
+
+        for process in alive:
+            log.warning(f"Force killing process {process.pid}")
+            process.kill()
+            process.join()
+        log.info("All processes terminated")
 
     except Exception as e:
-        print(f"Error in main: {e}")
+        log.error(f"Error in main: {e}")
         for process in processes:
             if process.is_alive():
                 process.terminate()
                 process.join()
 
+    finally:
+        # Children have exited, so everything they logged is already queued
+        log_listener.stop()
+
 
 if __name__ == "__main__":
     # Set multiprocessing start method
-    multiprocessing.set_start_method('spawn', force=True)
+    if sys.platform == 'win32':
+        multiprocessing.set_start_method('spawn', force=True)
+    else:
+        # Children fork from a clean server that already imported the heavy
+        # libraries. Nothing that installs the reactor is preloaded, so each
+        # child still gets its own.
+        multiprocessing.set_start_method('forkserver', force=True)
+        multiprocessing.set_forkserver_preload(['google.protobuf', 'twisted.internet.defer', 'twisted.python.failure'])
     main()
\ No newline at end of file